@@ -0,0 +1,114 @@
+"""
+Compare the /api/foods read path using pydantic Food models against
+FoodRecord tuples on a synthetic catalog.
+
+Run from the backend directory:
+    python -m benchmarks.food_records_benchmark --rows 100000
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import List
+from pydantic import TypeAdapter
+from database.init_db import initialize_database, get_db_connection
+from database.records import fetch_foods, food_dicts, dump_json
+from database.schema import Food
+
+def populate(db_path: str, rows: int):
+    initialize_database(db_path)
+    conn = get_db_connection(db_path)
+    rng = random.Random(42)
+    data = [
+        (f"Food {i}", f"طعام {i}", rng.uniform(10, 600), rng.uniform(0, 80), rng.uniform(0, 30),
+         rng.uniform(0, 60), rng.uniform(0, 50), rng.randint(0, 110), rng.choice(["Safe", "Moderate", "Avoid"]))
+        for i in range(rows)
+    ]
+    conn.executemany('''
+    INSERT INTO foods (name, name_ar, calories, carbs, protein, sugar, fat, glycemic_index, diabetic_suitability)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', data)
+    conn.commit()
+    conn.close()
+
+def load_models(conn) -> List[Food]:
+    """The previous read path: sqlite3.Row copied field by field into Food"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM foods ORDER BY name")
+    return [
+        Food(
+            id=row['id'], name=row['name'], name_ar=row['name_ar'], calories=row['calories'],
+            carbs=row['carbs'], protein=row['protein'], sugar=row['sugar'], fat=row['fat'],
+            glycemic_index=row['glycemic_index'], diabetic_suitability=row['diabetic_suitability']
+        )
+        for row in cursor.fetchall()
+    ]
+
+FOODS_ADAPTER = TypeAdapter(List[Food])
+
+def serialize_models(foods: List[Food]) -> bytes:
+    """What response_model=List[Food] does: re-validate, dump to JSON types, encode"""
+    validated = FOODS_ADAPTER.validate_python(foods)
+    content = FOODS_ADAPTER.dump_python(validated, mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def load_records(conn):
+    return fetch_foods(conn, "ORDER BY name")
+
+def serialize_records(foods) -> bytes:
+    return dump_json(food_dicts(foods))
+
+def measure(name: str, conn, load, serialize, rows: int):
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    start = time.perf_counter()
+    foods = load(conn)
+    load_time = time.perf_counter() - start
+    retained_blocks = sys.getallocatedblocks() - blocks_before
+
+    start = time.perf_counter()
+    body = serialize(foods)
+    serialize_time = time.perf_counter() - start
+
+    del foods
+    gc.collect()
+    tracemalloc.start()
+    serialize(load(conn))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:8} load {load_time * 1000:7.1f} ms | retained blocks {retained_blocks:9,} "
+        f"({retained_blocks / rows:.1f}/row) | serialize {serialize_time * 1000:7.1f} ms "
+        f"({rows / serialize_time:,.0f} rows/s) | peak {peak / 2**20:6.1f} MiB"
+    )
+    return body
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, "bench.db")
+        populate(db_path, args.rows)
+        conn = get_db_connection(db_path)
+        rows = conn.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+        models_body = measure("pydantic", conn, load_models, serialize_models, rows)
+        records_body = measure("records", conn, load_records, serialize_records, rows)
+        # Floats may be spelled differently (e.g. 7e-05 vs 0.00007)
+        print(f"same JSON values: {json.loads(models_body) == json.loads(records_body)}")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark chat question retrieval on a synthetic catalog of Q&A pairs.
+
+Run from the backend directory:
+    python -m benchmarks.qa_index_benchmark --rows 50000
+"""
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+import numpy as np
+from database.init_db import initialize_database, get_db_connection
+from models.qa_index import QAIndex
+
+FOODS = ["rice", "bread", "banana", "apple", "dates", "lentils", "hummus", "oatmeal", "pasta", "salmon",
+         "yogurt", "potato", "falafel", "spinach", "cheese", "orange", "almonds", "eggs", "avocado", "broccoli"]
+TEMPLATES = [
+    "Can diabetics eat {food} {n}?",
+    "Is {food} {n} good for blood sugar?",
+    "How much {food} {n} can a diabetic have per meal?",
+    "Does {food} {n} raise glucose quickly?",
+    "What is the glycemic index of {food} {n}?",
+]
+QUERIES = [
+    "is rice ok for sugar patients",
+    "bananas and diabetes",
+    "how many dates can I have",
+    "glycemic index of lentils",
+    "does bread spike glucose",
+]
+
+def populate(db_path: str, rows: int):
+    initialize_database(db_path)
+    conn = get_db_connection(db_path)
+    rng = random.Random(42)
+    data = []
+    for i in range(rows):
+        food = rng.choice(FOODS)
+        question = rng.choice(TEMPLATES).format(food=food, n=i)
+        data.append((question, question, "answer", "answer", f"{food},carbs"))
+    conn.executemany("INSERT INTO qa (question, question_ar, answer, answer_ar, tags) VALUES (?, ?, ?, ?, ?)", data)
+    conn.commit()
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    try:
+        db_path = os.path.join(workdir, "bench.db")
+        populate(db_path, args.rows)
+
+        index = QAIndex(index_dir=os.path.join(workdir, "qa_index"), db_path=db_path)
+        start = time.perf_counter()
+        index.refresh()
+        print(f"build: {time.perf_counter() - start:.2f} s for {len(index.slots)} rows")
+
+        conn = get_db_connection(db_path)
+        timings = []
+        for i in range(args.queries):
+            start = time.perf_counter()
+            index.search(QUERIES[i % len(QUERIES)], "en", top_k=10, conn=conn)
+            timings.append((time.perf_counter() - start) * 1000)
+        print(f"search: p50 {np.percentile(timings, 50):.2f} ms, p99 {np.percentile(timings, 99):.2f} ms")
+
+        conn.execute("UPDATE qa SET question = 'Is brown rice fine for sugar patients?' WHERE id = 1")
+        conn.commit()
+        start = time.perf_counter()
+        index.refresh(conn)
+        print(f"incremental update of 1 row: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        start = time.perf_counter()
+        reloaded = QAIndex(index_dir=index.index_dir, db_path=db_path)
+        reloaded.refresh(conn)
+        print(f"reload from disk: {(time.perf_counter() - start) * 1000:.2f} ms")
+        conn.close()
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,37 @@
 import sqlite3
 import os
+import sys
 import json
+import secrets
 
-def get_db_connection():
+# Tables whose changes are recorded in sync_log for incremental client sync
+SYNCED_TABLES = ("foods", "qa")
+
+DB_PATH = os.path.join(os.path.dirname(__file__), 'diabetic_nutrition.db')
+
+# Bytes of the database file SQLite reads through a memory map. Mapped pages
+# come from the OS page cache, so all worker processes share one copy of the
+# food catalog and Q&A tables instead of each filling its own page cache.
+MMAP_SIZE = 256 * 1024 * 1024
+
+def get_db_connection(db_path=DB_PATH):
     """Create a connection to the SQLite database"""
-    db_path = os.path.join(os.path.dirname(__file__), 'diabetic_nutrition.db')
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(db_path, timeout=5)
     conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
     return conn
 
-def initialize_database():
+def initialize_database(db_path=DB_PATH):
     """Initialize the database with tables and sample data"""
-    conn = get_db_connection()
+    # Imported here, after __main__ below has set up the import path when
+    # this file is run as a script
+    from database.schema import Food
+    from database.records import FOOD_FIELDS
+    
+    conn = get_db_connection(db_path)
+    
+    # WAL lets workers keep reading while another one writes
+    conn.execute("PRAGMA journal_mode=WAL")
     
     # Create tables
     conn.executescript('''
@@ -44,10 +64,61 @@ def initialize_database():
         answer_ar TEXT NOT NULL,
         tags TEXT
     );
+    
+    CREATE TABLE IF NOT EXISTS sync_log (
+        version INTEGER PRIMARY KEY AUTOINCREMENT,
+        table_name TEXT NOT NULL,
+        row_id INTEGER NOT NULL,
+        deleted INTEGER NOT NULL DEFAULT 0,
+        UNIQUE (table_name, row_id)
+    );
+    
+    -- Generated chat answers waiting for review before they are added to qa.
+    -- Not synced to clients.
+    CREATE TABLE IF NOT EXISTS qa_candidates (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        language TEXT NOT NULL,
+        question TEXT NOT NULL,
+        answer TEXT NOT NULL,
+        tags TEXT,
+        UNIQUE (language, question)
+    );
+    
+    -- Random id of this copy of the database. sync_log versions restart
+    -- when the database is recreated, so clients compare the epoch too.
+    CREATE TABLE IF NOT EXISTS sync_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        epoch TEXT NOT NULL
+    );
     ''')
     
-    # Check if data already exists
+    conn.execute("INSERT OR IGNORE INTO sync_meta (id, epoch) VALUES (1, ?)", (secrets.token_hex(8),))
+    conn.commit()
+    
+    # Record every change to the synced tables. INSERT OR REPLACE keeps a
+    # single log entry per row, moved to a new version on each change.
+    for table in SYNCED_TABLES:
+        conn.executescript(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_insert AFTER INSERT ON {table}
+        BEGIN
+            INSERT OR REPLACE INTO sync_log (table_name, row_id, deleted) VALUES ('{table}', NEW.id, 0);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_update AFTER UPDATE ON {table}
+        BEGIN
+            INSERT OR REPLACE INTO sync_log (table_name, row_id, deleted) VALUES ('{table}', NEW.id, 0);
+        END;
+        
+        CREATE TRIGGER IF NOT EXISTS {table}_sync_delete AFTER DELETE ON {table}
+        BEGIN
+            INSERT OR REPLACE INTO sync_log (table_name, row_id, deleted) VALUES ('{table}', OLD.id, 1);
+        END;
+        ''')
+    
+    # Check if data already exists. The write lock is taken before the check
+    # so workers starting together can't all find the tables empty and seed.
     cursor = conn.cursor()
+    cursor.execute("BEGIN IMMEDIATE")
     cursor.execute("SELECT COUNT(*) FROM foods")
     food_count = cursor.fetchone()[0]
     
@@ -83,10 +154,14 @@ def initialize_database():
             ("Shawarma (Chicken)", "شاورما دجاج", 392, 41, 15, 0, 20, 42, "Moderate")
         ]
         
+        # Validate on import, read paths trust stored rows (see records.py)
+        columns = FOOD_FIELDS[1:]
+        foods = [Food(**dict(zip(columns, food))) for food in foods]
+        
         cursor.executemany('''
         INSERT INTO foods (name, name_ar, calories, carbs, protein, sugar, fat, glycemic_index, diabetic_suitability) 
         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', foods)
+        ''', [tuple(getattr(food, column) for column in columns) for food in foods])
         
         # Sample QA data
         qa_data = [
@@ -170,7 +245,17 @@ def initialize_database():
         
         conn.commit()
     
+    # Backfill rows that existed before the change log was introduced
+    for table in SYNCED_TABLES:
+        conn.execute(
+            f"INSERT OR IGNORE INTO sync_log (table_name, row_id, deleted) SELECT '{table}', id, 0 FROM {table}"
+        )
+    conn.commit()
+    
     conn.close()
 
 if __name__ == "__main__":
+    # Also runs as a plain script (python database/init_db.py), where only
+    # this file's own directory is on the import path
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     initialize_database()
@@ -0,0 +1,50 @@
+from typing import Any, Iterable, List, NamedTuple, Optional
+import pydantic_core
+
+# Column order shared by FOOD_SELECT and FoodRecord
+FOOD_FIELDS = (
+    "id", "name", "name_ar", "calories", "carbs", "protein", "sugar", "fat",
+    "glycemic_index", "diabetic_suitability",
+)
+FOOD_SELECT = f"SELECT {', '.join(FOOD_FIELDS)} FROM foods"
+
+class FoodRecord(NamedTuple):
+    """
+    Read-only food row for the hot read paths.
+
+    Tuple-backed, so a row costs one allocation and no per-instance dict.
+    Values are not validated here: food rows are validated with the Food
+    model when they are written.
+    """
+    id: Optional[int]
+    name: str
+    name_ar: str
+    calories: float
+    carbs: float
+    protein: float
+    sugar: float
+    fat: float
+    glycemic_index: int
+    diabetic_suitability: str
+
+def food_record_factory(cursor, row) -> FoodRecord:
+    """sqlite3 row_factory for FOOD_SELECT queries"""
+    return FoodRecord._make(row)
+
+def fetch_foods(conn, where: str = "", params: Iterable[Any] = ()) -> list:
+    """Run FOOD_SELECT with an optional WHERE/ORDER/LIMIT clause and return FoodRecords"""
+    cursor = conn.cursor()
+    cursor.row_factory = food_record_factory
+    cursor.execute(f"{FOOD_SELECT} {where}", tuple(params))
+    return cursor.fetchall()
+
+def food_dicts(foods: Iterable[FoodRecord]) -> List[dict]:
+    """Field name -> value dicts for JSON output (records alone encode as arrays)"""
+    return [dict(zip(FOOD_FIELDS, food)) for food in foods]
+
+def dump_json(content: Any) -> bytes:
+    """
+    Serialize response data to compact UTF-8 JSON without pydantic model
+    re-validation, using pydantic-core's encoder directly.
+    """
+    return pydantic_core.to_json(content)
@@ -3,8 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import sqlite3
 import os
-from routers import food, chat
+from routers import food, chat, sync
 from database.init_db import initialize_database
+from models.qa_index import qa_index
 
 app = FastAPI(
     title="Diabetic Nutrition API",
@@ -24,11 +25,14 @@ app.add_middleware(
 # Include routers
 app.include_router(food.router, prefix="/api", tags=["food"])
 app.include_router(chat.router, prefix="/api", tags=["chat"])
+app.include_router(sync.router, prefix="/api", tags=["sync"])
 
 @app.on_event("startup")
 async def startup_event():
     # Initialize database
     initialize_database()
+    # Load or build the chat question index before the first request
+    qa_index.refresh()
 
 @app.get("/")
 async def root():
@@ -40,4 +44,14 @@ async def health_check():
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
+    if os.environ.get("APP_ENV") == "production":
+        # One worker per core by default. The database, Q&A index and caches
+        # are memory-mapped files, so extra workers don't duplicate them.
+        workers = int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1))
+        # Set up the database and index once, so the workers' startup hooks
+        # find them ready instead of all creating them at the same time
+        initialize_database()
+        qa_index.refresh()
+        uvicorn.run("main:app", host="0.0.0.0", port=port, workers=workers)
+    else:
+        uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
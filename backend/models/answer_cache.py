@@ -0,0 +1,42 @@
+import re
+from typing import Any, Dict, Optional
+from .shared_cache import SharedCache
+
+class AnswerCache:
+    """
+    Bounded LRU cache of generated chat answers, shared by all workers.
+
+    Keys are the question's words (lowercased, punctuation and extra spaces
+    removed) plus the language, so only trivially different spellings of a
+    question share an entry. Every word is kept, since words like "good" and
+    "bad" change the answer.
+    """
+
+    def __init__(self, max_entries: int = 1000):
+        self.store = SharedCache("answer_cache", max_entries)
+
+    @staticmethod
+    def key(question: str, language: str) -> Optional[str]:
+        words = re.findall(r'\w+', question.lower())
+        if not words:
+            return None
+        return f"{language}:{' '.join(words)}"
+
+    def get(self, question: str, language: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry and count the hit, or None"""
+        key = self.key(question, language)
+        if key is None:
+            return None
+        return self.store.increment(key, "hits")
+
+    def put(self, question: str, language: str, answer: str, tags: str = "", reviewable: bool = False):
+        """Cache an answer, `reviewable` marks it as worth queueing for review as a Q&A pair"""
+        key = self.key(question, language)
+        if key is None:
+            return
+        self.store.put(key, {
+            "question": question, "answer": answer, "tags": tags, "hits": 0, "reviewable": reviewable
+        })
+
+# Singleton instance
+answer_cache = AnswerCache()
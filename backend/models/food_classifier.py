@@ -3,7 +3,9 @@ import numpy as np
 import os
 from PIL import Image
 import io
+import hashlib
 from .openai_integration import openai_integration
+from .shared_cache import SharedCache
 
 class FoodClassifier:
     def __init__(self):
@@ -11,6 +13,9 @@ class FoodClassifier:
         self.labels = []
         self.model_loaded = False
         self.openai_available = openai_integration.is_available()
+        # OpenAI results by image hash, shared by all workers so a repeated
+        # image is only paid for once
+        self.result_cache = SharedCache("recognition_cache", max_entries=5000)
         self.load_model()
         
     def load_model(self):
@@ -62,6 +67,11 @@ class FoodClassifier:
         
         # Try OpenAI first if available
         if self.openai_available:
+            image_hash = hashlib.sha256(image_data).hexdigest()
+            cached_results = self.result_cache.get(image_hash)
+            if cached_results:
+                return cached_results
+            
             try:
                 print("Using OpenAI for food recognition...")
                 results = openai_integration.analyze_food_image(image_data)
@@ -81,6 +91,7 @@ class FoodClassifier:
                         # Sort by confidence, highest first
                         processed_results.sort(key=lambda x: x["confidence"], reverse=True)
                         print(f"OpenAI identified {len(processed_results)} food items")
+                        self.result_cache.put(image_hash, processed_results)
                         return processed_results
             except Exception as e:
                 print(f"Error using OpenAI for food recognition: {e}")
@@ -1,7 +1,7 @@
 import os
 import base64
 import json
-from typing import List, Dict, Any, Union
+from typing import List, Dict, Any, Union, Generator, Optional
 
 # The newest OpenAI model is "gpt-4o" which was released May 13, 2024.
 # Do not change this unless explicitly requested by the user
@@ -107,5 +107,46 @@ class OpenAIIntegration:
             print(f"Error analyzing food image with OpenAI: {e}")
             return [{"food": "error", "confidence": 0.0, "error": str(e)}]
 
+    def stream_chat_answer(self, question: str, language: str, context: str) -> Generator[str, None, Optional[str]]:
+        """
+        Answer a dietary question with GPT-4o, grounded in the given context.
+        Yields the answer text in chunks as it is generated, and returns the
+        finish reason ("stop" unless the answer was cut off).
+        """
+        if not self.is_available():
+            raise RuntimeError("OpenAI API key not configured")
+        
+        reply_language = "Arabic" if language == "ar" else "English"
+        
+        response = self.client.chat.completions.create(
+            model="gpt-4o",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a nutritional advisor for diabetic patients. Answer the user's question "
+                               "briefly (at most 4 sentences) and practically, using the reference Q&A and food "
+                               "data below when they are relevant. Do not give medication dosages, and suggest "
+                               f"consulting a healthcare provider for medical decisions. Reply in {reply_language}.\n\n"
+                               f"{context}"
+                },
+                {
+                    "role": "user",
+                    "content": question
+                }
+            ],
+            max_tokens=300,
+            stream=True,
+        )
+        
+        finish_reason = None
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            if chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.choices[0].finish_reason:
+                finish_reason = chunk.choices[0].finish_reason
+        return finish_reason
+
 # Singleton instance
 openai_integration = OpenAIIntegration()
\ No newline at end of file
@@ -0,0 +1,336 @@
+import os
+import re
+import json
+import zlib
+import fcntl
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from numpy.lib.format import open_memmap
+from database.init_db import get_db_connection, DB_PATH
+
+# Width of the hashed feature vectors. 256 float32 features keep a 50k-row
+# matrix at ~51 MB per language.
+DIM = 256
+LANGUAGES = ("en", "ar")
+INDEX_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'qa_index')
+
+# Weights of whole-word and character-trigram features
+WORD_WEIGHT = 1.0
+TRIGRAM_WEIGHT = 0.5
+
+STOP_WORDS = {
+    "the", "and", "for", "are", "can", "is", "it", "of", "to", "a", "an", "in", "on", "or",
+    "be", "do", "does", "what", "which", "how", "should", "i", "my", "me", "with", "when",
+    "ok", "okay", "good", "bad", "eat", "eating",
+    "هل", "من", "في", "على", "عن", "ما", "ماذا", "هي", "هو", "كيف", "يمكن", "يجب", "ان", "او", "الى",
+}
+
+_ARABIC_MARKS = re.compile(r'[\u064B-\u0652\u0640]')
+_ARABIC_LETTERS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ة": "ه", "ى": "ي"})
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, normalize Arabic letter variants and drop stop words"""
+    text = _ARABIC_MARKS.sub("", text.lower()).translate(_ARABIC_LETTERS)
+    tokens = []
+    for token in re.findall(r'\w+', text):
+        # Strip the Arabic definite article so "الارز" matches "ارز"
+        if token.startswith("ال") and len(token) > 4:
+            token = token[2:]
+        if token not in STOP_WORDS:
+            tokens.append(token)
+    return tokens
+
+def embed(text: str, dim: int = DIM) -> np.ndarray:
+    """
+    Turn text into a unit-length hashed bag of words and character trigrams.
+
+    Trigrams let paraphrases and inflections ("diabetic"/"diabetics") share
+    features without any model download.
+    """
+    features: Dict[int, float] = {}
+
+    def add(feature: str, weight: float):
+        # crc32 is stable across processes, unlike hash()
+        h = zlib.crc32(feature.encode("utf-8"))
+        bucket = h % dim
+        sign = -1.0 if h & 0x80000000 else 1.0
+        features[bucket] = features.get(bucket, 0.0) + sign * weight
+
+    for token in tokenize(text):
+        add("w:" + token, WORD_WEIGHT)
+        padded = f"#{token}#"
+        for i in range(len(padded) - 2):
+            add(padded[i:i + 3], TRIGRAM_WEIGHT)
+
+    vector = np.zeros(dim, dtype=np.float32)
+    if features:
+        vector[list(features.keys())] = list(features.values())
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+    return vector
+
+def document_texts(row) -> Dict[str, str]:
+    """Text indexed for each language of a qa row"""
+    tags = (row["tags"] or "").replace(",", " ")
+    return {
+        "en": f"{row['question']} {tags}",
+        "ar": f"{row['question_ar']} {tags}",
+    }
+
+class QAIndex:
+    """
+    Embedding index over qa.question and qa.question_ar.
+
+    Vectors live in memory-mapped float32 .npy files (one per language) so the
+    index survives restarts without re-embedding. The matrices are stored
+    feature-major (dim x rows): a query only has a few dozen non-zero
+    features, so a search reads just those rows instead of the whole matrix.
+    The sync_log version of the last applied change is stored alongside, and
+    only rows changed since then are re-embedded when the index is refreshed.
+
+    Worker processes map the same files, so the index is held in memory
+    once. Updates are serialized with a file lock, and a worker that finds
+    the files ahead of its own view reloads them instead of re-embedding.
+    """
+
+    def __init__(self, index_dir: str = INDEX_DIR, db_path: str = DB_PATH, dim: int = DIM):
+        self.index_dir = index_dir
+        self.db_path = db_path
+        self.dim = dim
+        self.lock = threading.Lock()
+        self.loaded = False
+        self.version = 0
+        self.count = 0
+        self.ids = None
+        self.vectors = {}
+        self.doc_freq = {}
+        self.idf = {}
+        self.slots = {}
+        self.free_slots = []
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.index_dir, name)
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self.ids is None else len(self.ids)
+
+    def refresh(self, conn=None):
+        """Bring the index up to date with the qa table"""
+        own_conn = conn is None
+        if own_conn:
+            conn = get_db_connection(self.db_path)
+        try:
+            with self.lock:
+                latest = conn.execute("SELECT COALESCE(MAX(version), 0) FROM sync_log").fetchone()[0]
+                if self.loaded and latest == self.version:
+                    return
+
+                os.makedirs(self.index_dir, exist_ok=True)
+                with open(self.path("lock"), "w") as lock_file:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+                    # Another worker may have already written this update, and
+                    # the database may have moved on while waiting for the lock.
+                    # Comparing against a stale version would look like the
+                    # database went back and trigger a needless rebuild.
+                    if not self.loaded or self.disk_version() != self.version:
+                        self.loaded = self.load()
+                    latest = conn.execute("SELECT COALESCE(MAX(version), 0) FROM sync_log").fetchone()[0]
+                    if not self.loaded or latest < self.version:
+                        # Missing index or the database was recreated
+                        self.rebuild(conn, latest)
+                    elif latest > self.version:
+                        self.apply_changes(conn, latest)
+        finally:
+            if own_conn:
+                conn.close()
+
+    def disk_version(self) -> int:
+        """Version recorded in the index files, -1 if there are none"""
+        try:
+            with open(self.path("meta.json")) as f:
+                return json.load(f)["version"]
+        except (OSError, ValueError, KeyError):
+            return -1
+
+    def load(self) -> bool:
+        """Open an existing index from disk, returns False if there is none"""
+        try:
+            with open(self.path("meta.json")) as f:
+                meta = json.load(f)
+            if meta.get("dim") != self.dim:
+                return False
+            self.ids = open_memmap(self.path("ids.npy"), mode="r+")
+            self.vectors = {lang: open_memmap(self.path(f"{lang}.npy"), mode="r+") for lang in LANGUAGES}
+        except (OSError, ValueError) as e:
+            print(f"QA index not loaded, rebuilding: {e}")
+            return False
+
+        self.version = meta["version"]
+        self.count = meta["count"]
+        self.slots = {}
+        self.free_slots = []
+        for slot, qa_id in enumerate(self.ids[:self.count].tolist()):
+            if qa_id >= 0:
+                self.slots[qa_id] = slot
+            else:
+                self.free_slots.append(slot)
+        for lang in LANGUAGES:
+            self.doc_freq[lang] = np.count_nonzero(self.vectors[lang][:, :self.count], axis=1).astype(np.float32)
+        self.update_idf()
+        return True
+
+    def rebuild(self, conn, version: int):
+        """Embed every qa row from scratch"""
+        rows = conn.execute("SELECT id, question, question_ar, tags FROM qa").fetchall()
+        os.makedirs(self.index_dir, exist_ok=True)
+
+        self.count = 0
+        self.allocate(max(1024, int(len(rows) * 1.25)))
+        self.slots = {}
+        self.free_slots = []
+        self.doc_freq = {lang: np.zeros(self.dim, dtype=np.float32) for lang in LANGUAGES}
+        for row in rows:
+            self.put(row)
+
+        self.version = version
+        self.save()
+        print(f"QA index rebuilt with {len(rows)} questions")
+
+    def apply_changes(self, conn, version: int):
+        """Re-embed only the qa rows changed after the indexed version"""
+        changes = conn.execute(
+            "SELECT row_id, deleted FROM sync_log WHERE version > ? AND table_name = 'qa'",
+            (self.version,)
+        ).fetchall()
+
+        changed_ids = []
+        for change in changes:
+            if change["deleted"]:
+                self.remove(change["row_id"])
+            else:
+                changed_ids.append(change["row_id"])
+
+        found = set()
+        for start in range(0, len(changed_ids), 500):
+            chunk = changed_ids[start:start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            for row in conn.execute(
+                f"SELECT id, question, question_ar, tags FROM qa WHERE id IN ({placeholders})", chunk
+            ):
+                self.put(row)
+                found.add(row["id"])
+        for qa_id in changed_ids:
+            if qa_id not in found:
+                self.remove(qa_id)
+
+        self.version = version
+        self.save()
+
+    def allocate(self, capacity: int):
+        """Create (or grow into) memory-mapped arrays with room for `capacity` rows"""
+        old_ids, old_vectors = self.ids, self.vectors
+        used = self.count
+
+        ids = open_memmap(self.path("ids.tmp.npy"), mode="w+", dtype=np.int64, shape=(capacity,))
+        ids[:] = -1
+        vectors = {}
+        for lang in LANGUAGES:
+            vectors[lang] = open_memmap(self.path(f"{lang}.tmp.npy"), mode="w+", dtype=np.float32, shape=(self.dim, capacity))
+        if old_ids is not None and used:
+            ids[:used] = old_ids[:used]
+            for lang in LANGUAGES:
+                vectors[lang][:, :used] = old_vectors[lang][:, :used]
+
+        # Swap the new files in place of the old ones
+        ids.flush()
+        os.replace(self.path("ids.tmp.npy"), self.path("ids.npy"))
+        for lang in LANGUAGES:
+            vectors[lang].flush()
+            os.replace(self.path(f"{lang}.tmp.npy"), self.path(f"{lang}.npy"))
+        self.ids, self.vectors = ids, vectors
+
+    def put(self, row):
+        """Insert or replace the vectors of one qa row"""
+        qa_id = row["id"]
+        slot = self.slots.get(qa_id)
+        if slot is None:
+            if self.free_slots:
+                slot = self.free_slots.pop()
+            else:
+                if self.count == self.capacity:
+                    self.allocate(self.capacity * 2)
+                slot = self.count
+                self.count += 1
+            self.slots[qa_id] = slot
+        else:
+            for lang in LANGUAGES:
+                self.doc_freq[lang] -= self.vectors[lang][:, slot] != 0
+
+        for lang, text in document_texts(row).items():
+            vector = embed(text, self.dim)
+            self.vectors[lang][:, slot] = vector
+            self.doc_freq[lang] += vector != 0
+        self.ids[slot] = qa_id
+
+    def remove(self, qa_id: int):
+        """Drop one qa row from the index, leaving its slot for reuse"""
+        slot = self.slots.pop(qa_id, None)
+        if slot is None:
+            return
+        for lang in LANGUAGES:
+            self.doc_freq[lang] -= self.vectors[lang][:, slot] != 0
+            self.vectors[lang][:, slot] = 0
+        self.ids[slot] = -1
+        self.free_slots.append(slot)
+
+    def update_idf(self):
+        n_docs = len(self.slots)
+        for lang in LANGUAGES:
+            self.idf[lang] = (np.log((n_docs + 1) / (self.doc_freq[lang] + 1)) + 1).astype(np.float32)
+
+    def save(self):
+        """Flush vectors and record the indexed version"""
+        self.update_idf()
+        self.ids.flush()
+        for lang in LANGUAGES:
+            self.vectors[lang].flush()
+        meta_tmp = self.path("meta.json.tmp")
+        with open(meta_tmp, "w") as f:
+            json.dump({"version": self.version, "count": self.count, "dim": self.dim}, f)
+        os.replace(meta_tmp, self.path("meta.json"))
+
+    def search(self, query: str, language: str = "en", top_k: int = 10, conn=None) -> List[Tuple[int, float]]:
+        """
+        Return up to `top_k` (qa id, cosine score) pairs, best first.
+
+        Query features are weighted by inverse document frequency so rare
+        words like food names count more than "diabetics".
+        """
+        self.refresh(conn)
+        if language not in LANGUAGES:
+            language = "en"
+
+        with self.lock:
+            if not self.slots:
+                return []
+            query_vector = embed(query, self.dim) * self.idf[language]
+            norm = np.linalg.norm(query_vector)
+            if norm == 0:
+                return []
+            query_vector /= norm
+
+            features = np.flatnonzero(query_vector)
+            scores = query_vector[features] @ self.vectors[language][features, :self.count]
+            k = min(top_k, self.count)
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            ids = self.ids[top]
+
+            return [(int(qa_id), float(score)) for qa_id, score in zip(ids, scores[top]) if qa_id >= 0 and score > 0]
+
+# Singleton instance
+qa_index = QAIndex()
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Any, Optional
+
+CACHE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'database', 'cache.db')
+
+# Bytes of the cache file SQLite reads through a shared memory map
+MMAP_SIZE = 64 * 1024 * 1024
+
+# Seconds between last_used updates of an entry. Reads within this window
+# don't write, so hot entries don't make every read take the write lock.
+TOUCH_INTERVAL = 60
+
+class SharedCache:
+    """
+    Bounded LRU key/value store shared by all worker processes.
+
+    Entries are JSON values in a SQLite file opened in WAL mode with
+    memory-mapped reads, so every worker sees the same entries and reads the
+    same pages from the OS page cache instead of keeping its own copy.
+    """
+
+    def __init__(self, name: str, max_entries: int = 1000, db_path: str = CACHE_DB_PATH):
+        self.name = name
+        self.max_entries = max_entries
+        self.db_path = db_path
+        # Connections are opened lazily per thread, so none is inherited
+        # across the fork of a worker process
+        self.local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+            conn.executescript(f'''
+            CREATE TABLE IF NOT EXISTS {self.name} (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS {self.name}_last_used ON {self.name} (last_used);
+            ''')
+            self.local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self.connection()
+        row = conn.execute(f"SELECT value, last_used FROM {self.name} WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[1] > TOUCH_INTERVAL:
+            conn.execute(f"UPDATE {self.name} SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+        return json.loads(row[0])
+
+    def increment(self, key: str, field: str) -> Optional[Any]:
+        """
+        Add one to a numeric field of an entry's value in a single statement,
+        so concurrent workers don't lose counts. Returns the updated value, or
+        None if there is no such entry (a missing entry is not re-created).
+        """
+        conn = self.connection()
+        row = conn.execute(
+            f"UPDATE {self.name} SET value = json_set(value, '$.' || ?, json_extract(value, '$.' || ?) + 1), "
+            f"last_used = ? WHERE key = ? RETURNING value",
+            (field, field, time.time(), key)
+        ).fetchone()
+        conn.commit()
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key: str, value: Any):
+        conn = self.connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.name} (key, value, last_used) VALUES (?, ?, ?)",
+            (key, json.dumps(value, ensure_ascii=False), time.time())
+        )
+        # Evict the least recently used entries beyond the bound
+        conn.execute(
+            f"DELETE FROM {self.name} WHERE key IN "
+            f"(SELECT key FROM {self.name} ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        )
+        conn.commit()
+
+    def delete(self, key: str) -> bool:
+        """Remove an entry, returns False if it was not there (e.g. another worker removed it first)"""
+        conn = self.connection()
+        cursor = conn.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+        conn.commit()
+        return cursor.rowcount > 0
@@ -1,133 +1,410 @@
 from fastapi import APIRouter, HTTPException, Body
-from typing import List, Optional
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Iterator, List, Optional, Tuple
 import sqlite3
 import re
+import json
 from database.init_db import get_db_connection
-from database.schema import ChatQuestion, ChatResponse, Food
+from database.schema import ChatQuestion, ChatResponse
+from database.records import FoodRecord, fetch_foods, food_dicts, dump_json
+from models.qa_index import qa_index, tokenize
+from models.answer_cache import answer_cache
+from models.openai_integration import openai_integration
+from routers.food import generate_suitability_explanation
 
 router = APIRouter()
 
-@router.post("/chat", response_model=ChatResponse)
-async def chat(question: ChatQuestion = Body(...)):
+# Share of the embedding score in the combined match score (the rest is
+# keyword overlap), and the combined score a question needs to be used
+SEMANTIC_WEIGHT = 0.7
+MIN_MATCH_SCORE = 0.35
+
+# The keyword fallback checks this many LIKE hits and uses the first that
+# contains this share of the question's content words
+KEYWORD_CANDIDATES = 20
+MIN_KEYWORD_OVERLAP = 0.6
+
+# Grounding passed to the LLM: closest Q&A pairs and foods named in the
+# question. Pairs need this combined score, which generic questions that
+# only share words like "diabetics" with a pair stay below.
+GROUNDING_QA_COUNT = 3
+MIN_GROUNDING_SCORE = 0.3
+GROUNDING_FOOD_COUNT = 3
+
+# A generated answer served again from the cache this many times is queued
+# in qa_candidates for review, so recurring questions can be added to the
+# qa table. Hits only keep one-off questions out of the queue: they are not
+# counted per client, so they never stand in for the review itself.
+REVIEW_AFTER_HITS = 3
+
+GENERIC_ANSWERS = {
+    "en": "I don't have specific information about that. Please try asking about specific foods, nutritional advice for diabetics, or general diabetes dietary guidelines.",
+    "ar": "ليس لدي معلومات محددة حول ذلك. يرجى محاولة السؤال عن أطعمة محددة، أو نصائح غذائية لمرضى السكري، أو إرشادات غذائية عامة لمرض السكري.",
+}
+
+SUITABILITY_AR = {
+    "Safe": "آمن",
+    "Moderate": "باعتدال",
+    "Avoid": "يفضل تجنبه",
+}
+
+def keyword_overlap(query_tokens: set, row) -> float:
+    """Share of the question's content words found in a Q&A row's question or tags"""
+    if not query_tokens:
+        return 0.0
+    row_tokens = set(tokenize(f"{row['question']} {(row['tags'] or '').replace(',', ' ')}"))
+    return len(query_tokens & row_tokens) / len(query_tokens)
+
+def rank_questions(conn, query: str, language: str, top_k: int = 10):
     """
-    Process a user's dietary question and return a response
+    Rank Q&A pairs by embedding similarity combined with keyword overlap.
+    Returns (score, row) pairs, best first.
     """
     try:
-        language = question.language.lower()
-        if language not in ["en", "ar"]:
-            language = "en"  # Default to English
-            
-        query = question.question.strip()
-        
-        # Connect to database
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # First, try to find an exact match
-        if language == "en":
-            cursor.execute(
-                "SELECT question, answer, tags FROM qa WHERE LOWER(question) = LOWER(?)", 
-                (query,)
-            )
-        else:
-            cursor.execute(
-                "SELECT question_ar as question, answer_ar as answer, tags FROM qa WHERE LOWER(question_ar) = LOWER(?)", 
-                (query,)
-            )
+        candidates = qa_index.search(query, language, top_k=top_k, conn=conn)
+    except Exception as e:
+        print(f"Error searching QA index: {e}")
+        return []
+    
+    if not candidates:
+        return []
+    
+    rows_by_id = fetch_qa_rows(conn, [qa_id for qa_id, _ in candidates], language)
+    
+    query_tokens = set(tokenize(query))
+    ranked = []
+    for qa_id, semantic_score in candidates:
+        row = rows_by_id.get(qa_id)
+        if row is None:
+            continue
         
-        result = cursor.fetchone()
+        lexical_score = keyword_overlap(query_tokens, row)
+        score = SEMANTIC_WEIGHT * semantic_score + (1 - SEMANTIC_WEIGHT) * lexical_score
+        ranked.append((score, row))
+    
+    ranked.sort(key=lambda pair: pair[0], reverse=True)
+    return ranked
+
+def find_similar_question(conn, query: str, language: str):
+    """Return the best ranked Q&A row, or None if nothing scores above MIN_MATCH_SCORE"""
+    ranked = rank_questions(conn, query, language)
+    if ranked and ranked[0][0] > MIN_MATCH_SCORE:
+        return ranked[0][1]
+    return None
+
+def fetch_qa_rows(conn, ids: List[int], language: str):
+    """Fetch Q&A rows by id in the requested language, skipping rows without an answer in it"""
+    if not ids:
+        return {}
+    placeholders = ", ".join("?" for _ in ids)
+    if language == "en":
+        rows = conn.execute(
+            f"SELECT id, question, answer, tags FROM qa WHERE id IN ({placeholders}) AND answer != ''", ids
+        ).fetchall()
+    else:
+        rows = conn.execute(
+            f"SELECT id, question_ar as question, answer_ar as answer, tags FROM qa WHERE id IN ({placeholders}) AND answer_ar != ''", ids
+        ).fetchall()
+    return {row["id"]: row for row in rows}
+
+def find_answer(conn, query: str, language: str):
+    """Find the stored Q&A row that best answers the question, or None"""
+    cursor = conn.cursor()
+    
+    # First, try to find an exact match
+    if language == "en":
+        cursor.execute(
+            "SELECT question, answer, tags FROM qa WHERE LOWER(question) = LOWER(?) AND answer != ''",
+            (query,)
+        )
+    else:
+        cursor.execute(
+            "SELECT question_ar as question, answer_ar as answer, tags FROM qa WHERE LOWER(question_ar) = LOWER(?) AND answer_ar != ''",
+            (query,)
+        )
+    
+    result = cursor.fetchone()
+    
+    # If no exact match, look for a similarly worded question
+    if not result:
+        result = find_similar_question(conn, query, language)
+    
+    # If still no match, try keyword matching
+    if not result:
+        # Extract keywords (3+ letter words)
+        keywords = re.findall(r'\b\w{3,}\b', query.lower())
         
-        # If no exact match, try keyword matching
-        if not result:
-            # Extract keywords (3+ letter words)
-            keywords = re.findall(r'\b\w{3,}\b', query.lower())
+        if keywords:
+            # Search by keywords in question or tags
+            search_conditions = []
+            search_params = []
             
-            if keywords:
-                # Search by keywords in question or tags
-                search_conditions = []
-                search_params = []
-                
-                for keyword in keywords:
-                    if language == "en":
-                        search_conditions.append("LOWER(question) LIKE ? OR LOWER(tags) LIKE ?")
-                    else:
-                        search_conditions.append("LOWER(question_ar) LIKE ? OR LOWER(tags) LIKE ?")
-                    search_params.extend([f"%{keyword}%", f"%{keyword}%"])
-                
-                search_query = " OR ".join(search_conditions)
-                
+            for keyword in keywords:
                 if language == "en":
-                    cursor.execute(
-                        f"SELECT question, answer, tags FROM qa WHERE {search_query} ORDER BY length(question) ASC LIMIT 1", 
-                        search_params
-                    )
+                    search_conditions.append("LOWER(question) LIKE ? OR LOWER(tags) LIKE ?")
                 else:
-                    cursor.execute(
-                        f"SELECT question_ar as question, answer_ar as answer, tags FROM qa WHERE {search_query} ORDER BY length(question_ar) ASC LIMIT 1", 
-                        search_params
-                    )
-                
-                result = cursor.fetchone()
-        
-        # If still no result, provide a generic response
-        if not result:
+                    search_conditions.append("LOWER(question_ar) LIKE ? OR LOWER(tags) LIKE ?")
+                search_params.extend([f"%{keyword}%", f"%{keyword}%"])
+            
+            search_query = " OR ".join(search_conditions)
+            
             if language == "en":
-                generic_answer = "I don't have specific information about that. Please try asking about specific foods, nutritional advice for diabetics, or general diabetes dietary guidelines."
+                cursor.execute(
+                    f"SELECT question, answer, tags FROM qa WHERE ({search_query}) AND answer != '' ORDER BY length(question) ASC LIMIT {KEYWORD_CANDIDATES}",
+                    search_params
+                )
             else:
-                generic_answer = "ليس لدي معلومات محددة حول ذلك. يرجى محاولة السؤال عن أطعمة محددة، أو نصائح غذائية لمرضى السكري، أو إرشادات غذائية عامة لمرض السكري."
+                cursor.execute(
+                    f"SELECT question_ar as question, answer_ar as answer, tags FROM qa WHERE ({search_query}) AND answer_ar != '' ORDER BY length(question_ar) ASC LIMIT {KEYWORD_CANDIDATES}",
+                    search_params
+                )
             
-            return ChatResponse(
-                answer=generic_answer,
-                related_foods=[]
+            # A single shared word like "diabetics" matches nearly every row,
+            # so require most of the question's content words to match
+            query_tokens = set(tokenize(query))
+            for row in cursor.fetchall():
+                if keyword_overlap(query_tokens, row) >= MIN_KEYWORD_OVERLAP:
+                    result = row
+                    break
+    
+    return result
+
+def find_related_foods(conn, tags: Optional[str]) -> List[FoodRecord]:
+    """Get foods named by the food-related tags of a Q&A pair"""
+    related_foods = []
+    if not tags:
+        return related_foods
+    
+    tags = tags.split(",")
+    food_tags = [tag for tag in tags if not tag.startswith(("carbs", "sugar", "protein", "nutrition", "glycemic", "meal", "diet"))]
+    
+    if food_tags:
+        # Build query to find related foods
+        food_conditions = []
+        food_params = []
+        
+        for tag in food_tags:
+            food_conditions.append("LOWER(name) LIKE ? OR LOWER(name_ar) LIKE ?")
+            food_params.extend([f"%{tag}%", f"%{tag}%"])
+        
+        food_query = " OR ".join(food_conditions)
+        
+        related_foods = fetch_foods(conn, f"WHERE {food_query} LIMIT 3", food_params)
+    
+    return related_foods
+
+def find_grounding(conn, query: str, language: str):
+    """Collect the closest Q&A pairs and the foods named in a question"""
+    qa_rows = [
+        row for score, row in rank_questions(conn, query, language, top_k=GROUNDING_QA_COUNT)
+        if score >= MIN_GROUNDING_SCORE
+    ]
+    
+    foods = []
+    query_tokens = set(tokenize(query))
+    keywords = [token for token in query_tokens if len(token) >= 3]
+    if keywords:
+        food_conditions = []
+        food_params = []
+        for keyword in keywords:
+            food_conditions.append("LOWER(name) LIKE ? OR LOWER(name_ar) LIKE ?")
+            food_params.extend([f"%{keyword}%", f"%{keyword}%"])
+        
+        # LIKE also matches inside words ("meal" in "Oatmeal"), so keep only
+        # foods whose name shares a whole word with the question
+        candidates = fetch_foods(conn, f"WHERE {' OR '.join(food_conditions)}", food_params)
+        foods = [
+            food for food in candidates
+            if query_tokens & set(tokenize(f"{food.name} {food.name_ar}"))
+        ][:GROUNDING_FOOD_COUNT]
+    
+    return qa_rows, foods
+
+def build_context(qa_rows, foods: List[FoodRecord]) -> str:
+    """Format grounding data for the LLM prompt"""
+    lines = []
+    if qa_rows:
+        lines.append("Reference Q&A:")
+        for row in qa_rows:
+            lines.append(f"Q: {row['question']}")
+            lines.append(f"A: {row['answer']}")
+    if foods:
+        lines.append("Food data (per serving):")
+        for food in foods:
+            lines.append(
+                f"- {food.name} ({food.name_ar}): {food.calories} kcal, {food.carbs}g carbs, {food.sugar}g sugar, "
+                f"{food.protein}g protein, {food.fat}g fat, glycemic index {food.glycemic_index}, "
+                f"suitability for diabetics: {food.diabetic_suitability}"
             )
+    return "\n".join(lines) if lines else "No reference data found."
+
+def local_answer(foods: List[FoodRecord], language: str) -> str:
+    """Answer from the food table alone when the LLM is unavailable"""
+    if not foods:
+        return GENERIC_ANSWERS[language]
+    
+    if language == "en":
+        return " ".join(generate_suitability_explanation(food) for food in foods)
+    
+    return " ".join(
+        f"{food.name_ar}: {SUITABILITY_AR.get(food.diabetic_suitability, food.diabetic_suitability)} لمرضى السكري "
+        f"(المؤشر الجلايسيمي {food.glycemic_index}، السكر {food.sugar} جرام، الكربوهيدرات {food.carbs} جرام)."
+        for food in foods
+    )
+
+def queue_for_review(conn, entry, language: str):
+    """Add a generated answer to the qa_candidates review queue"""
+    # The unique (language, question) pair keeps one candidate per question
+    conn.execute(
+        "INSERT OR IGNORE INTO qa_candidates (language, question, answer, tags) VALUES (?, ?, ?, ?)",
+        (language, entry["question"], entry["answer"], entry["tags"])
+    )
+    conn.commit()
+
+def prepare_answer(query: str, language: str) -> Tuple[Optional[str], List[FoodRecord], Optional[str]]:
+    """
+    Do all database work for a question in one call.
+    
+    Returns the stored, cached or local answer (None when the LLM should
+    generate one), the related foods, and the grounding context for the LLM.
+    """
+    conn = get_db_connection()
+    try:
+        result = find_answer(conn, query, language)
+        if result:
+            return result["answer"], find_related_foods(conn, result["tags"]), None
         
-        answer = result["answer"]
+        qa_rows, foods = find_grounding(conn, query, language)
         
-        # Get related foods if there are food-related tags
-        related_foods = []
-        if result["tags"]:
-            tags = result["tags"].split(",")
-            food_tags = [tag for tag in tags if not tag.startswith(("carbs", "sugar", "protein", "nutrition", "glycemic", "meal", "diet"))]
-            
-            if food_tags:
-                # Build query to find related foods
-                food_conditions = []
-                food_params = []
-                
-                for tag in food_tags:
-                    food_conditions.append("LOWER(name) LIKE ? OR LOWER(name_ar) LIKE ?")
-                    food_params.extend([f"%{tag}%", f"%{tag}%"])
-                
-                food_query = " OR ".join(food_conditions)
-                
-                cursor.execute(
-                    f"SELECT * FROM foods WHERE {food_query} LIMIT 3", 
-                    food_params
-                )
-                
-                food_results = cursor.fetchall()
-                
-                for food_data in food_results:
-                    food = Food(
-                        id=food_data['id'],
-                        name=food_data['name'],
-                        name_ar=food_data['name_ar'],
-                        calories=food_data['calories'],
-                        carbs=food_data['carbs'],
-                        protein=food_data['protein'],
-                        sugar=food_data['sugar'],
-                        fat=food_data['fat'],
-                        glycemic_index=food_data['glycemic_index'],
-                        diabetic_suitability=food_data['diabetic_suitability']
-                    )
-                    related_foods.append(food)
+        cached = answer_cache.get(query, language)
+        if cached:
+            # Hits are counted atomically, so only one request sees the threshold
+            if cached.get("reviewable") and cached["hits"] == REVIEW_AFTER_HITS:
+                try:
+                    queue_for_review(conn, cached, language)
+                except sqlite3.Error as e:
+                    print(f"Error queueing generated answer for review: {e}")
+            return cached["answer"], foods, None
         
+        if not openai_integration.is_available():
+            return local_answer(foods, language), foods, None
+        
+        return None, foods, build_context(qa_rows, foods)
+    finally:
         conn.close()
+
+def generate_answer(query: str, language: str, foods: List[FoodRecord], context: str) -> Iterator[str]:
+    """
+    Yield an LLM answer in chunks, grounded by `context`.
+    
+    Uses no database connection, so the chunks can be pulled from any
+    thread. A local summary of the foods is used when the LLM fails before
+    answering.
+    """
+    chunks = []
+    try:
+        stream = openai_integration.stream_chat_answer(query, language, context)
+        while True:
+            try:
+                chunk = next(stream)
+            except StopIteration as end:
+                finish_reason = end.value
+                break
+            chunks.append(chunk)
+            yield chunk
+    except Exception as e:
+        print(f"Error generating chat answer with OpenAI: {e}")
+        # Part of the answer was already sent, so end it there
+        if chunks:
+            return
+    else:
+        answer = "".join(chunks).strip()
+        if answer:
+            tags = ",".join(food.name.lower() for food in foods)
+            # Only complete answers to questions about foods in the database
+            # are worth reviewing; others are served from the cache only
+            reviewable = finish_reason == "stop" and bool(foods)
+            answer_cache.put(query, language, answer, tags, reviewable)
+            return
+    
+    yield local_answer(foods, language)
+
+def parse_question(question: ChatQuestion):
+    language = question.language.lower()
+    if language not in ["en", "ar"]:
+        language = "en"  # Default to English
+    return question.question.strip(), language
+
+def chat_response(answer: str, related_foods: List[FoodRecord]) -> Response:
+    """Build the ChatResponse JSON directly, food rows were validated when written"""
+    return Response(
+        content=dump_json({
+            "answer": answer,
+            "related_foods": food_dicts(related_foods)
+        }),
+        media_type="application/json"
+    )
+
+@router.post("/chat", response_model=ChatResponse)
+async def chat(question: ChatQuestion = Body(...)):
+    """
+    Process a user's dietary question and return a response
+    """
+    try:
+        query, language = parse_question(question)
         
-        return ChatResponse(
-            answer=answer,
-            related_foods=related_foods
-        )
+        # Look up the answer off the event loop
+        answer, related_foods, context = await run_in_threadpool(prepare_answer, query, language)
         
+        # No stored answer matches, so generate one
+        if answer is None:
+            answer = await run_in_threadpool("".join, generate_answer(query, language, related_foods, context))
+        
+        return chat_response(answer, related_foods)
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(question: ChatQuestion = Body(...)):
+    """
+    Process a user's dietary question and stream the response as server-sent
+    events: `token` events carry answer text as it is produced, and a final
+    `done` event carries the full answer and related foods.
+    """
+    query, language = parse_question(question)
+    
+    try:
+        answer, related_foods, context = await run_in_threadpool(prepare_answer, query, language)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
+    
+    def events():
+        try:
+            if answer is not None:
+                full_answer = answer
+                yield sse_event("token", {"text": answer})
+            else:
+                chunks = []
+                for chunk in generate_answer(query, language, related_foods, context):
+                    chunks.append(chunk)
+                    yield sse_event("token", {"text": chunk})
+                full_answer = "".join(chunks)
+            
+            yield sse_event("done", {
+                "answer": full_answer,
+                "related_foods": food_dicts(related_foods)
+            })
+        except Exception as e:
+            yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+    
+    # A sync generator is run in the threadpool, so LLM calls don't block the event loop
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
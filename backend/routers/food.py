@@ -1,9 +1,10 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Body
-from typing import List
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Body, Response
+from typing import List, Union
 import sqlite3
 from models.food_classifier import food_classifier
 from database.init_db import get_db_connection
 from database.schema import FoodDetection, NutritionResponse, Food
+from database.records import FoodRecord, fetch_foods, food_dicts, dump_json
 
 router = APIRouter()
 
@@ -30,37 +31,27 @@ async def get_nutrition(food_name: str):
     """
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         
         # Case-insensitive search
-        cursor.execute("SELECT * FROM foods WHERE LOWER(name) = LOWER(?)", (food_name,))
-        food_data = cursor.fetchone()
+        foods = fetch_foods(conn, "WHERE LOWER(name) = LOWER(?) LIMIT 1", (food_name,))
         
         conn.close()
         
-        if not food_data:
+        if not foods:
             raise HTTPException(status_code=404, detail=f"Food '{food_name}' not found")
         
-        # Convert to Food model
-        food_info = Food(
-            id=food_data['id'],
-            name=food_data['name'],
-            name_ar=food_data['name_ar'],
-            calories=food_data['calories'],
-            carbs=food_data['carbs'],
-            protein=food_data['protein'],
-            sugar=food_data['sugar'],
-            fat=food_data['fat'],
-            glycemic_index=food_data['glycemic_index'],
-            diabetic_suitability=food_data['diabetic_suitability']
-        )
+        food_info = foods[0]
         
         # Generate suitability explanation
         explanation = generate_suitability_explanation(food_info)
         
-        return NutritionResponse(
-            food_info=food_info,
-            suitability_explanation=explanation
+        # Rows were validated when written, so skip response_model re-validation
+        return Response(
+            content=dump_json({
+                "food_info": food_info._asdict(),
+                "suitability_explanation": explanation
+            }),
+            media_type="application/json"
         )
         
     except Exception as e:
@@ -68,7 +59,7 @@ async def get_nutrition(food_name: str):
             raise e
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
 
-def generate_suitability_explanation(food: Food) -> str:
+def generate_suitability_explanation(food: Union[Food, FoodRecord]) -> str:
     """Generate an explanation of why a food is suitable/unsuitable for diabetics"""
     
     suitability = food.diabetic_suitability
@@ -122,30 +113,16 @@ async def list_foods():
     """
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
         
-        cursor.execute("SELECT * FROM foods ORDER BY name")
-        foods_data = cursor.fetchall()
+        foods = fetch_foods(conn, "ORDER BY name")
         
         conn.close()
         
-        foods = []
-        for food_data in foods_data:
-            food = Food(
-                id=food_data['id'],
-                name=food_data['name'],
-                name_ar=food_data['name_ar'],
-                calories=food_data['calories'],
-                carbs=food_data['carbs'],
-                protein=food_data['protein'],
-                sugar=food_data['sugar'],
-                fat=food_data['fat'],
-                glycemic_index=food_data['glycemic_index'],
-                diabetic_suitability=food_data['diabetic_suitability']
-            )
-            foods.append(food)
-        
-        return foods
+        # Rows were validated when written, so skip response_model re-validation
+        return Response(
+            content=dump_json(food_dicts(foods)),
+            media_type="application/json"
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
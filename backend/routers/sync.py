@@ -0,0 +1,128 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from typing import Dict, List, Any, Optional
+import json
+import msgpack
+from database.init_db import get_db_connection, SYNCED_TABLES
+
+router = APIRouter()
+
+# Columns sent for each synced table, in the order used by the delta rows
+SYNC_COLUMNS = {
+    "foods": ["id", "name", "name_ar", "calories", "carbs", "protein", "sugar", "fat", "glycemic_index", "diabetic_suitability"],
+    "qa": ["id", "question", "question_ar", "answer", "answer_ar", "tags"],
+}
+
+# Keep IN (...) lists below SQLite's bound-parameter limit
+ID_CHUNK_SIZE = 500
+
+def fetch_rows(cursor, table: str, ids: List[int]) -> List[List[Any]]:
+    """Fetch the current values of the given rows as positional lists"""
+    columns = ", ".join(SYNC_COLUMNS[table])
+    rows = []
+    for start in range(0, len(ids), ID_CHUNK_SIZE):
+        chunk = ids[start:start + ID_CHUNK_SIZE]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor.execute(f"SELECT {columns} FROM {table} WHERE id IN ({placeholders})", chunk)
+        rows.extend(list(row) for row in cursor.fetchall())
+    return rows
+
+def build_delta(since: int, limit: int, epoch: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Collect the changes recorded after `since`, at most `limit` rows.
+
+    Rows are sent as positional lists matching `columns`, and deleted rows
+    only as ids (tombstones). Pass the returned `version` back as `since`
+    and the returned `epoch` as `epoch` to fetch the next page.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM sync_log")
+    latest_version = cursor.fetchone()[0]
+    cursor.execute("SELECT epoch FROM sync_meta WHERE id = 1")
+    server_epoch = cursor.fetchone()[0]
+
+    # The database was recreated since the client's last sync. Its versions
+    # and row ids mean something else now, so the client has to discard its
+    # copy and sync from scratch.
+    reset = since > 0 and (epoch != server_epoch or since > latest_version)
+    if reset:
+        since = 0
+
+    cursor.execute(
+        "SELECT version, table_name, row_id, deleted FROM sync_log WHERE version > ? ORDER BY version LIMIT ?",
+        (since, limit + 1)
+    )
+    changes = cursor.fetchall()
+
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    upsert_ids = {table: [] for table in SYNCED_TABLES}
+    deleted_ids = {table: [] for table in SYNCED_TABLES}
+    for change in changes:
+        if change["table_name"] not in upsert_ids:
+            continue
+        if change["deleted"]:
+            deleted_ids[change["table_name"]].append(change["row_id"])
+        else:
+            upsert_ids[change["table_name"]].append(change["row_id"])
+
+    tables = {}
+    for table in SYNCED_TABLES:
+        rows = fetch_rows(cursor, table, upsert_ids[table]) if upsert_ids[table] else []
+
+        # A row logged as changed but already gone is a tombstone too
+        found = {row[0] for row in rows}
+        deleted = deleted_ids[table] + [row_id for row_id in upsert_ids[table] if row_id not in found]
+
+        if rows or deleted:
+            tables[table] = {
+                "columns": SYNC_COLUMNS[table],
+                "upserts": rows,
+                "deleted": deleted,
+            }
+
+    conn.close()
+
+    return {
+        "epoch": server_epoch,
+        "version": changes[-1]["version"] if changes else latest_version,
+        "has_more": has_more,
+        "reset": reset,
+        "tables": tables,
+    }
+
+@router.get("/sync")
+async def sync(
+    since: int = Query(0, ge=0, description="Last version the client has applied"),
+    limit: int = Query(500, ge=1, le=5000, description="Maximum number of changed rows per page"),
+    epoch: Optional[str] = Query(None, description="Database epoch returned with the client's last sync"),
+    format: str = Query("msgpack", description="Response encoding: 'msgpack' or 'json'")
+):
+    """
+    Return the changes to foods and Q&A made after a client's last sync version
+    """
+    try:
+        delta = build_delta(since, limit, epoch)
+        headers = {
+            "X-Sync-Epoch": delta["epoch"],
+            "X-Sync-Version": str(delta["version"]),
+            "X-Sync-Has-More": "1" if delta["has_more"] else "0",
+        }
+
+        if format.lower() == "msgpack":
+            return Response(
+                content=msgpack.packb(delta, use_bin_type=True),
+                media_type="application/x-msgpack",
+                headers=headers
+            )
+
+        return Response(
+            content=json.dumps(delta, ensure_ascii=False, separators=(",", ":")),
+            media_type="application/json",
+            headers=headers
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Sync error: {str(e)}")
@@ -14,6 +14,10 @@ void main() async {
   // Initialize services
   await DatabaseService.instance.initializeDatabase();
   
+  // Pull server-side food and QA changes in the background; the app keeps
+  // working from the local copy if the backend is unreachable
+  DatabaseService.instance.syncWithServer();
+  
   // Force portrait orientation
   await SystemChrome.setPreferredOrientations([
     DeviceOrientation.portraitUp,
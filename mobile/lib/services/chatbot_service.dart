@@ -76,7 +76,8 @@ class ChatbotService {
         whereArgs.add('%$keyword%');
       }
       
-      String whereClause = conditions.join(' OR ');
+      // Skip answers saved in the other language only
+      String whereClause = '(${conditions.join(' OR ')}) AND $answerField != \'\'';
       
       // Query QA table
       final List<Map<String, dynamic>> results = await db.query(
@@ -2,8 +2,12 @@ import 'dart:convert';
 import 'package:sqflite/sqflite.dart';
 import 'package:path/path.dart';
 import 'package:flutter/services.dart' show rootBundle;
+import 'package:http/http.dart' as http;
+import 'package:msgpack_dart/msgpack_dart.dart' as msgpack;
+import 'package:shared_preferences/shared_preferences.dart';
 import '../models/food.dart';
 import '../models/user.dart';
+import '../utils/constants.dart';
 
 class DatabaseService {
   // Singleton instance
@@ -17,6 +21,11 @@ class DatabaseService {
   // Private constructor for singleton pattern
   DatabaseService._internal();
   
+  // Keys under which the last applied server sync version and the epoch of
+  // the server database it belongs to are stored
+  static const String _syncVersionKey = 'sync_version';
+  static const String _syncEpochKey = 'sync_epoch';
+  
   Database? _database;
   
   // Get database instance
@@ -217,4 +226,73 @@ class DatabaseService {
     
     return null;
   }
+  
+  // Pull foods and QA changes made on the server since the last sync.
+  // Only changed rows and tombstones are downloaded, one page at a time.
+  Future<bool> syncWithServer({int pageSize = 500}) async {
+    try {
+      final db = await database;
+      final prefs = await SharedPreferences.getInstance();
+      int since = prefs.getInt(_syncVersionKey) ?? 0;
+      String epoch = prefs.getString(_syncEpochKey) ?? '';
+      bool hasMore = true;
+      
+      while (hasMore) {
+        final response = await http.get(
+          Uri.parse('${ApiConstants.baseUrl}/api/sync?since=$since&limit=$pageSize&format=msgpack'
+              '&epoch=${Uri.encodeQueryComponent(epoch)}'),
+        );
+        
+        if (response.statusCode != 200) {
+          print('Sync failed. Status: ${response.statusCode}, Body: ${response.body}');
+          return false;
+        }
+        
+        final Map delta = msgpack.deserialize(response.bodyBytes);
+        final Map tables = delta['tables'] ?? {};
+        
+        // The bundled seed data has locally assigned ids, so the first full
+        // sync replaces it just like a server-side reset
+        final bool replaceLocal = since == 0 || delta['reset'] == true;
+        
+        await db.transaction((txn) async {
+          final batch = txn.batch();
+          
+          if (replaceLocal) {
+            batch.delete('foods');
+            batch.delete('qa');
+          }
+          
+          tables.forEach((table, changes) {
+            final List columns = changes['columns'];
+            
+            for (var row in changes['upserts']) {
+              final Map<String, dynamic> values = {};
+              for (var i = 0; i < columns.length; i++) {
+                values[columns[i] as String] = row[i];
+              }
+              batch.insert(table as String, values, conflictAlgorithm: ConflictAlgorithm.replace);
+            }
+            
+            for (var id in changes['deleted']) {
+              batch.delete(table as String, where: 'id = ?', whereArgs: [id]);
+            }
+          });
+          
+          await batch.commit(noResult: true);
+        });
+        
+        since = delta['version'] as int;
+        epoch = delta['epoch'] as String;
+        hasMore = delta['has_more'] == true;
+        await prefs.setInt(_syncVersionKey, since);
+        await prefs.setString(_syncEpochKey, epoch);
+      }
+      
+      return true;
+    } catch (e) {
+      print('Error syncing with server: $e');
+      return false;
+    }
+  }
 }